@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
-import plotly.express as px
-import time
+import asyncio
+from datetime import date
+from pathlib import Path
+# httpx, scipy and plotly are imported inside the functions that use them
+# so they are not loaded before the first paint
 
 # Set page configuration
 st.set_page_config(
@@ -13,52 +15,45 @@ st.set_page_config(
 )
 
 # Add custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E88E5;
-        text-align: center;
-    }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #424242;
-    }
-    .risk-high {
-        color: #D32F2F;
-        font-weight: bold;
-    }
-    .risk-medium {
-        color: #FFA000;
-        font-weight: bold;
-    }
-    .risk-low {
-        color: #388E3C;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    """Read the dashboard stylesheet"""
+    return (Path(__file__).parent / ".streamlit" / "style.css").read_text()
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
+
+# Per-session values, created once since Streamlit re-runs this script on every interaction
+if "rng" not in st.session_state:
+    # Random generator for unseeded demo values
+    st.session_state.rng = np.random.default_rng()
+if "today" not in st.session_state:
+    # Date shown in the footer
+    st.session_state.today = date.today().isoformat()
 
-# Cache function to improve performance
-@st.cache_data(ttl=3600)
+COUNTRIES_URL = "https://api.worldbank.org/v2/country?format=json&per_page=300"
+
+async def fetch_json(url):
+    """Fetch JSON from a World Bank API endpoint"""
+    import httpx
+    
+    async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+# Cache function to improve performance (shared, read-only reference data)
+@st.cache_resource(ttl=3600)
 def get_countries():
     """Get list of countries from World Bank API"""
     try:
-        response = requests.get("http://api.worldbank.org/v2/country?format=json&per_page=300")
-        data = response.json()
-        countries = []
+        data = asyncio.run(fetch_json(COUNTRIES_URL))
         
         # Skip first element (metadata)
-        for country in data[1]:
-            # Filter out aggregates and regions
-            if country['region']['value'] != "Aggregates":
-                countries.append({
-                    'id': country['id'],
-                    'name': country['name'],
-                    'region': country['region']['value']
-                })
+        countries = pd.json_normalize(data[1])[['id', 'name', 'region.value']]
+        countries = countries.rename(columns={'region.value': 'region'})
         
-        return pd.DataFrame(countries)
+        # Filter out aggregates and regions
+        return countries[countries['region'] != "Aggregates"].reset_index(drop=True)
     except Exception as e:
         st.error(f"Error fetching countries: {e}")
         # Return a simple dataframe with a few countries
@@ -70,64 +65,117 @@ def get_countries():
             {'id': 'IND', 'name': 'India', 'region': 'South Asia'}
         ])
 
-@st.cache_data(ttl=3600)
-def get_indicators():
-    """Return commonly used economic indicators"""
-    indicators = [
-        {"id": "NY.GDP.MKTP.CD", "name": "GDP (current US$)"},
-        {"id": "NY.GDP.MKTP.KD.ZG", "name": "GDP growth (annual %)"},
-        {"id": "FP.CPI.TOTL.ZG", "name": "Inflation, consumer prices (annual %)"}
-    ]
-    return pd.DataFrame(indicators)
+# Commonly used economic indicators:
+# (id, name, display format, sample noise mean, sample noise std dev, sample trend base)
+INDICATORS = (
+    # GDP in trillions with growth
+    ("NY.GDP.MKTP.CD", "GDP (current US$)", "usd_trillion", 0, 0, 1.0),
+    # GDP growth around 2-4%
+    ("NY.GDP.MKTP.KD.ZG", "GDP growth (annual %)", "pct", 3, 1, 0),
+    # Inflation around 2-3%
+    ("FP.CPI.TOTL.ZG", "Inflation, consumer prices (annual %)", "pct", 2.5, 0.8, 0),
+)
+INDICATOR_NAMES = tuple(row[1] for row in INDICATORS)
+INDICATOR_FORMATS = {row[1]: row[2] for row in INDICATORS}
+
+# Display formatters for each indicator "format" value
+VALUE_FORMATTERS = {
+    "pct": lambda v: f"{v:.2f}%",
+    "usd_trillion": lambda v: f"${v/1e12:.2f} Trillion",
+    "raw": lambda v: f"{v:.2f}",
+}
+
+@st.cache_resource(ttl=3600)
+def get_country_lookups():
+    """Return name -> id lookup, region options and region -> sorted country names"""
+    countries_df = get_countries()
+    ids = countries_df['id'].to_numpy()
+    names = countries_df['name'].to_numpy()
+    regions = countries_df['region'].to_numpy()
+    
+    region_list = np.unique(regions).tolist()
+    names_by_region = {"All Regions": np.sort(names).tolist()}
+    for region in region_list:
+        names_by_region[region] = np.sort(names[regions == region]).tolist()
+    
+    return dict(zip(names, ids)), ["All Regions"] + region_list, names_by_region
 
 # Generate sample data instead of using API
-def get_sample_data(indicator, start_year, end_year):
-    """Generate sample data for demonstration"""
-    years = list(range(start_year, end_year + 1))
+@st.cache_data(ttl=3600, max_entries=512)
+def get_sample_data(start_year, end_year):
+    """Generate sample data for every indicator from a single random draw"""
+    from scipy import signal
     
-    # Different patterns for different indicators
-    if "GDP" in indicator and "growth" in indicator:
-        # GDP growth around 2-4%
-        values = [np.random.normal(3, 1) for _ in years]
-    elif "Inflation" in indicator:
-        # Inflation around 2-3%
-        values = [np.random.normal(2.5, 0.8) for _ in years]
-    else:
-        # GDP in trillions with growth
-        base = 1.0 if "GDP" in indicator else 200.0
-        values = [base * (1 + 0.03) ** i for i, _ in enumerate(years)]
+    years = np.arange(start_year, end_year + 1)
+    n = len(years)
+    # Seed from the arguments so cached results stay consistent
+    rng = np.random.default_rng(hash((start_year, end_year)) & 0xFFFFFFFF)
     
-    # Add some trends and make it smoother
-    for i in range(1, len(values)):
-        values[i] = 0.7 * values[i-1] + 0.3 * values[i]
+    # One row per indicator: noise around its mean plus its compounding trend
+    loc, scale, base = np.array([row[3:] for row in INDICATORS], dtype=float).T
+    values = rng.normal(loc[:, None], scale[:, None], size=(len(INDICATORS), n))
+    values += base[:, None] * (1 + 0.03) ** np.arange(n)
+    
+    # Add some trends and make it smoother (AR(1) filter, first value kept as-is)
+    values = signal.lfilter([0.3], [1.0, -0.7], values, axis=1, zi=0.7 * values[:, :1])[0]
+    
+    return {
+        name: pd.DataFrame({'year': years, 'value': row})
+        for name, row in zip(INDICATOR_NAMES, values)
+    }
+
+def get_sample_data_batch(indicators, start_year, end_year):
+    """Return sample data for the selected indicators"""
+    sample_data = get_sample_data(start_year, end_year)
+    return {indicator: sample_data[indicator] for indicator in indicators}
+
+@st.cache_data(ttl=3600, max_entries=512)
+def indicators_chart_json(indicators, start_year, end_year, values):
+    """Build the faceted indicators line chart and return it as Plotly JSON"""
+    import plotly.express as px
     
-    return pd.DataFrame({
-        'year': years,
-        'value': values
+    years = np.arange(start_year, end_year + 1)
+    long_df = pd.DataFrame({
+        'indicator': np.repeat(indicators, len(years)),
+        'year': np.tile(years, len(indicators)),
+        'value': np.concatenate(values)
     })
+    fig = px.line(
+        long_df,
+        x='year',
+        y='value',
+        color='indicator',
+        facet_row='indicator',
+        markers=True,
+        height=350 * len(indicators),
+        title=f"Selected Indicators ({start_year}-{end_year})"
+    )
+    fig.update_yaxes(matches=None, title_text="Value")
+    fig.update_xaxes(title_text="Year")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=", 1)[-1]))
+    fig.update_layout(showlegend=False)
+    return fig.to_json()
 
 def calculate_risk_score(indicators_data):
     """Calculate a simple risk score from 0-10"""
     # Just for demonstration, return a random score between 2 and 8
-    return np.random.uniform(2, 8)
+    return st.session_state.rng.uniform(2, 8)
 
-def risk_analysis(score):
-    """Convert risk score to assessment and color"""
-    if score >= 7:
-        return "High Risk", "risk-high"
-    elif score >= 4:
-        return "Medium Risk", "risk-medium"
-    else:
-        return "Low Risk", "risk-low"
+# Risk bands: lower score bound -> (assessment, CSS class, outlook)
+_RISK_THRESHOLDS = np.array([0, 4, 7])
+_RISK_BANDS = [
+    ("Low Risk", "risk-low",
+     "Economic conditions appear favorable with positive outlook for sustained growth and stability."),
+    ("Medium Risk", "risk-medium",
+     "Economic conditions show mixed signals with moderate risks. Careful monitoring recommended."),
+    ("High Risk", "risk-high",
+     "Economic conditions face significant headwinds. Policy intervention may be needed to stabilize growth and inflation."),
+]
 
-def generate_outlook(score):
-    """Generate a simple economic outlook based on risk score"""
-    if score >= 7:
-        return "Economic conditions face significant headwinds. Policy intervention may be needed to stabilize growth and inflation."
-    elif score >= 4:
-        return "Economic conditions show mixed signals with moderate risks. Careful monitoring recommended."
-    else:
-        return "Economic conditions appear favorable with positive outlook for sustained growth and stability."
+def risk_analysis(score):
+    """Convert risk score to assessment, color and economic outlook"""
+    band = max(int(np.searchsorted(_RISK_THRESHOLDS, score, side='right')) - 1, 0)
+    return _RISK_BANDS[band]
 
 def run_dashboard():
     """Main dashboard function"""
@@ -139,39 +187,30 @@ def run_dashboard():
     st.sidebar.header("Filters")
     
     # Load countries data
-    countries_df = get_countries()
+    country_ids, regions, names_by_region = get_country_lookups()
     
     # Region filter
-    regions = ["All Regions"] + sorted(countries_df['region'].unique().tolist())
     selected_region = st.sidebar.selectbox("Select Region", regions)
     
-    # Filter countries by region
-    if selected_region != "All Regions":
-        filtered_countries = countries_df[countries_df['region'] == selected_region]
-    else:
-        filtered_countries = countries_df
-    
     # Country selection
     selected_country_name = st.sidebar.selectbox(
         "Select Country",
-        options=sorted(filtered_countries['name'].tolist()),
+        options=names_by_region[selected_region],
         index=0
     )
     
     # Get country code
-    selected_country_data = filtered_countries[filtered_countries['name'] == selected_country_name]
-    selected_country_code = selected_country_data.iloc[0]['id'] if not selected_country_data.empty else None
+    selected_country_code = country_ids.get(selected_country_name)
     
     # Date range
     start_year = st.sidebar.slider("Start Year", 2010, 2022, 2015)
     end_year = st.sidebar.slider("End Year", start_year+1, 2023, 2023)
     
     # Indicator selection
-    indicators_df = get_indicators()
     selected_indicators = st.sidebar.multiselect(
         "Select Indicators",
-        options=indicators_df['name'].tolist(),
-        default=indicators_df['name'].tolist()[:2]  # Default to first 2 indicators
+        options=list(INDICATOR_NAMES),
+        default=list(INDICATOR_NAMES[:2])  # Default to first 2 indicators
     )
     
     st.markdown("<h2 class='sub-header'>Economic Data</h2>", unsafe_allow_html=True)
@@ -180,82 +219,71 @@ def run_dashboard():
         st.warning("Please select a country and at least one indicator.")
         return
     
-    # Show a loading spinner while fetching data
-    with st.spinner(f"Loading data for {selected_country_name}..."):
-        # Container for indicator data
-        indicators_data = {}
-        
-        # Generate sample data for each selected indicator
-        for indicator in selected_indicators:
-            sample_data = get_sample_data(indicator, start_year, end_year)
-            indicators_data[indicator] = sample_data
-            
-        # Simulate loading time
-        time.sleep(0.5)
-        
-    # Calculate risk score
-    risk_score = calculate_risk_score(indicators_data)
-    risk_label, risk_class = risk_analysis(risk_score)
-    
-    # Layout with 3 columns
+    # Lay out the page first, then fill each section as soon as its data is ready
     col1, col2, col3 = st.columns([1, 1, 1])
     
     # Column 1: Key metrics
     with col1:
         st.markdown("<h3>Key Metrics</h3>", unsafe_allow_html=True)
-        
-        # Display latest values for selected indicators
-        for indicator in selected_indicators:
-            data = indicators_data[indicator]
-            latest_value = data.iloc[-1]['value']
-            
-            if "growth" in indicator.lower() or "inflation" in indicator.lower():
-                st.metric(indicator, f"{latest_value:.2f}%")
-            elif "gdp" in indicator.lower():
-                st.metric(indicator, f"${latest_value/1e12:.2f} Trillion")
-            else:
-                st.metric(indicator, f"{latest_value:.2f}")
+        metric_slots = {indicator: st.empty() for indicator in selected_indicators}
+        for indicator, slot in metric_slots.items():
+            slot.caption(f"Loading {indicator}...")
     
     # Column 2: Risk Assessment
     with col2:
         st.markdown("<h3>Risk Assessment</h3>", unsafe_allow_html=True)
-        st.markdown(f"<h4>Overall Risk: <span class='{risk_class}'>{risk_label}</span></h4>", unsafe_allow_html=True)
-        
-        # Risk score display
-        st.progress(risk_score / 10)
-        st.write(f"Risk Score: {risk_score:.2f}/10")
+        risk_slot = st.empty()
+        risk_slot.caption("Calculating risk score...")
     
     # Column 3: Outlook
     with col3:
         st.markdown("<h3>Economic Outlook</h3>", unsafe_allow_html=True)
-        outlook = generate_outlook(risk_score)
-        st.write(outlook)
+        outlook_slot = st.empty()
+        outlook_slot.caption("Generating outlook...")
     
     # Main charts section
     st.markdown("---")
     st.markdown("<h2 class='sub-header'>Economic Indicators</h2>", unsafe_allow_html=True)
+    chart_slot = st.empty()
+    chart_slot.caption(f"Loading charts for {selected_country_name}...")
     
-    # Create charts for each selected indicator
+    # Generate sample data for all selected indicators at once
+    indicators_data = get_sample_data_batch(selected_indicators, start_year, end_year)
+    
+    # Display latest values for selected indicators
     for indicator in selected_indicators:
-        indicator_data = indicators_data[indicator]
+        data = indicators_data[indicator]
+        latest_value = data['value'].iat[-1]
         
-        st.subheader(indicator)
+        metric_slots[indicator].metric(indicator, VALUE_FORMATTERS[INDICATOR_FORMATS[indicator]](latest_value))
+    
+    # Calculate risk score
+    risk_score = calculate_risk_score(indicators_data)
+    risk_label, risk_class, outlook = risk_analysis(risk_score)
+    
+    with risk_slot.container():
+        st.markdown(f"<h4>Overall Risk: <span class='{risk_class}'>{risk_label}</span></h4>", unsafe_allow_html=True)
         
-        # Plot line chart
-        fig = px.line(
-            indicator_data, 
-            x='year', 
-            y='value',
-            markers=True,
-            title=f"{indicator} ({start_year}-{end_year})"
-        )
-        fig.update_layout(xaxis_title="Year", yaxis_title="Value")
-        st.plotly_chart(fig, use_container_width=True)
+        # Risk score display
+        st.progress(risk_score / 10)
+        st.write(f"Risk Score: {risk_score:.2f}/10")
+    
+    outlook_slot.write(outlook)
+    
+    # Plot all selected indicators in a single faceted line chart
+    import plotly.io as pio
+    chart_json = indicators_chart_json(
+        tuple(indicators_data),
+        start_year,
+        end_year,
+        tuple(tuple(data['value']) for data in indicators_data.values())
+    )
+    chart_slot.plotly_chart(pio.from_json(chart_json), use_container_width=True)
     
     # Footer
     st.markdown("---")
     st.caption("Note: This is a simplified demonstration using simulated data")
-    st.caption("Last updated: " + pd.Timestamp.now().strftime("%Y-%m-%d"))
+    st.caption("Last updated: " + st.session_state.today)
 
 # Run the application
 if __name__ == "__main__":